@@ -4,6 +4,7 @@ from typing import Union, Callable
 import networkx as nx
 
 from src.flood_wave_data import FloodWaveData
+from src.flood_wave_handler import FloodWaveHandler
 
 
 class Analysis:
@@ -30,7 +31,8 @@ class Analysis:
                 joined_graph: nx.DiGraph,
                 start_station: int,
                 end_station: int,
-                func: Callable
+                func: Callable,
+                components: Union[list, None] = None
                   ) -> list:
         """
         Iterates through all the connected components within the input graph joined_graph.
@@ -43,25 +45,23 @@ class Analysis:
         :param int start_station: The ID of the station from which you want to get the reachable end nodes.
         :param int end_station: The ID of the desired end station.
         :param Callable func:
+        :param Union[list, None] components: The weakly connected components of joined_graph if they are already
+                                             computed, otherwise they are computed here.
         :return list: The results organized into a list.
         """
         
-        connected_components = [
-            list(x)
-            for x in nx.weakly_connected_components(joined_graph)
-        ]
+        if components is None:
+            components = FloodWaveHandler.get_weakly_connected_components(graph=joined_graph)
         counted_quantity = []
-        for sub_connected_component in connected_components:
-            start_nodes = [
-                node
-                for node in sub_connected_component
-                if int(node[0]) == start_station
-            ]
-            end_nodes = [
-                node
-                for node in sub_connected_component
-                if int(node[0]) == end_station
-            ]
+        for sub_connected_component in components:
+            start_nodes = []
+            end_nodes = []
+            for node in sub_connected_component:
+                gauge = int(node[0])
+                if gauge == start_station:
+                    start_nodes.append(node)
+                if gauge == end_station:
+                    end_nodes.append(node)
             counted_quantity.extend(func(j_graph=joined_graph,
                                          start_nodes=start_nodes,
                                          end_nodes=end_nodes))
@@ -88,9 +88,8 @@ class Analysis:
             for start in start_nodes:
                 for end in end_nodes:
                     try:
-                        nx.shortest_path(j_graph, start, end)
-                        waves.append((nx.shortest_path(j_graph, start, end)[0],
-                                      nx.shortest_path(j_graph, start, end)[-1]))
+                        path = nx.shortest_path(j_graph, start, end)
+                        waves.append((path[0], path[-1]))
                     except nx.NetworkXNoPath:
                         continue
             return waves
@@ -99,54 +98,120 @@ class Analysis:
                                                       end_station=end_station,
                                                       func=func)))
 
-    def propagation_time(
+    def collect_propagation_times(
             self,
             joined_graph: nx.DiGraph,
             start_station: int,
-            end_station: int
-    ) -> int:
+            end_station: int,
+            count_paths: bool
+    ) -> list:
         """
-        Returns the average propagation time of flood waves between the two selected stations unweighted,
-        meaning that no matter how many paths are between the same two vertices, the propagation time value
-        will be only counted in once.
+        Collects the propagation times of flood waves between the two selected stations for every reachable pair of
+        start and end nodes. The shortest paths between a pair are only enumerated if count_paths is True, otherwise
+        a single path search decides the reachability.
 
         :param nx.DiGraph joined_graph: The full composed graph of the desired time interval.
         :param int start_station: The ID of the desired start station
         :param int end_station: The ID of the last station, which is not reached by the flood waves
-        :return float: The average propagation time of flood waves in joined_graph between the two given stations.
+        :param bool count_paths: Boolean whether to count the shortest paths between the pairs or not
+        :return list: List of (propagation time, number of shortest paths) tuples. The number of shortest paths is 1
+        if count_paths is False.
         """
         def func(j_graph, start_nodes, end_nodes):
             prop_times = []
-
+            # The dates of the end nodes are parsed only once, not for every start node
+            end_dates = [datetime.strptime(end[1], '%Y-%m-%d').date() for end in end_nodes]
             for start in start_nodes:
                 start_date = datetime.strptime(start[1], '%Y-%m-%d').date()
-                for end in end_nodes:
-                    try:
-                        nx.shortest_path(j_graph, start, end)
-                        end_date = datetime.strptime(end[1], '%Y-%m-%d').date()
-                        diff = (end_date - start_date).days
-                        prop_times.append(diff)
-                    except nx.NetworkXNoPath:
+                for end, end_date in zip(end_nodes, end_dates):
+                    if count_paths:
+                        try:
+                            path_count = sum(1 for _ in nx.all_shortest_paths(j_graph, start, end))
+                        except nx.NetworkXNoPath:
+                            continue
+                    elif nx.has_path(j_graph, start, end):
+                        path_count = 1
+                    else:
                         continue
+                    prop_times.append(((end_date - start_date).days, path_count))
             return prop_times
-        
-        prop_times_total = self.connected_components_iter(joined_graph=joined_graph,
-                                                          start_station=start_station,
-                                                          end_station=end_station,
-                                                          func=func)
-        if sum(prop_times_total):
-            avg_prop_time = sum(prop_times_total) / len(prop_times_total)
+
+        return self.connected_components_iter(joined_graph=joined_graph,
+                                              start_station=start_station,
+                                              end_station=end_station,
+                                              func=func)
+
+    @staticmethod
+    def average_propagation_time(prop_times: list, weighted: bool) -> float:
+        """
+        Averages the propagation times collected by collect_propagation_times.
+
+        :param list prop_times: List of (propagation time, number of shortest paths) tuples
+        :param bool weighted: Boolean whether to weight the propagation times by the number of shortest paths or not
+        :return float: The (weighted) average propagation time, 0 if the propagation times sum up to 0
+        """
+        if weighted:
+            total_prop_time = sum(diff * path_count for diff, path_count in prop_times)
+            count = sum(path_count for _, path_count in prop_times)
         else:
-            avg_prop_time = 0
-  
-        return avg_prop_time
+            total_prop_time = sum(diff for diff, _ in prop_times)
+            count = len(prop_times)
+        if total_prop_time:
+            return total_prop_time / count
+        return 0
+
+    def propagation_times(
+            self,
+            joined_graph: nx.DiGraph,
+            start_station: int,
+            end_station: int
+    ) -> tuple:
+        """
+        Returns both the unweighted and the weighted average propagation time of flood waves between the two selected
+        stations, computed in a single pass over the connected components. Use it when both values are needed, since
+        the weighted value requires enumerating all the shortest paths.
+
+        :param nx.DiGraph joined_graph: The full composed graph of the desired time interval.
+        :param int start_station: The ID of the desired start station
+        :param int end_station: The ID of the last station, which is not reached by the flood waves
+        :return tuple: The unweighted and the weighted average propagation time of flood waves in joined_graph between
+        the two given stations.
+        """
+        prop_times = self.collect_propagation_times(joined_graph=joined_graph,
+                                                    start_station=start_station,
+                                                    end_station=end_station,
+                                                    count_paths=True)
+        return (Analysis.average_propagation_time(prop_times=prop_times, weighted=False),
+                Analysis.average_propagation_time(prop_times=prop_times, weighted=True))
+
+    def propagation_time(
+            self,
+            joined_graph: nx.DiGraph,
+            start_station: int,
+            end_station: int
+    ) -> float:
+        """
+        Returns the average propagation time of flood waves between the two selected stations unweighted,
+        meaning that no matter how many paths are between the same two vertices, the propagation time value
+        will be only counted in once.
+
+        :param nx.DiGraph joined_graph: The full composed graph of the desired time interval.
+        :param int start_station: The ID of the desired start station
+        :param int end_station: The ID of the last station, which is not reached by the flood waves
+        :return float: The average propagation time of flood waves in joined_graph between the two given stations.
+        """
+        prop_times = self.collect_propagation_times(joined_graph=joined_graph,
+                                                    start_station=start_station,
+                                                    end_station=end_station,
+                                                    count_paths=False)
+        return Analysis.average_propagation_time(prop_times=prop_times, weighted=False)
 
     def propagation_time_weighted(
             self,
             joined_graph: nx.DiGraph,
             start_station: int,
             end_station: int
-    ) -> int:
+    ) -> float:
         """
         Returns the weighted average propagation time of flood waves between the two selected stations. Each time value
         is weighted by the number of paths with that given propagation time.
@@ -157,30 +222,11 @@ class Analysis:
         :return float: The weighted average propagation time of flood waves in joined_graph between
         the two given stations.
         """
-        def func(j_graph, start_nodes, end_nodes):
-            prop_times = []
-            for start in start_nodes:
-                start_date = datetime.strptime(start[1], '%Y-%m-%d').date()
-                for end in end_nodes:
-                    try:
-                        paths = [p for p in nx.all_shortest_paths(j_graph, start, end)]
-                        end_date = datetime.strptime(end[1], '%Y-%m-%d').date()
-                        diff = [(end_date - start_date).days] * len(paths)
-                        prop_times.extend(diff)
-                    except nx.NetworkXNoPath:
-                        continue
-            return prop_times
-            
-        prop_times_total = self.connected_components_iter(joined_graph=joined_graph,
-                                                          start_station=start_station,
-                                                          end_station=end_station,
-                                                          func=func)
-        if sum(prop_times_total):
-            avg_prop_time = sum(prop_times_total) / len(prop_times_total)
-        else:
-            avg_prop_time = 0
-        
-        return avg_prop_time
+        prop_times = self.collect_propagation_times(joined_graph=joined_graph,
+                                                    start_station=start_station,
+                                                    end_station=end_station,
+                                                    count_paths=True)
+        return Analysis.average_propagation_time(prop_times=prop_times, weighted=True)
 
     def count_unfinished_waves(self,
                                joined_graph: nx.DiGraph,
@@ -216,7 +262,7 @@ class Analysis:
         connected_components = [
             list(x)
             for x in nx.connected_components(subgraph)
-            if len(list(x)) >= 2
+            if len(x) >= 2
         ]
        
         unfinished_waves = 0
@@ -254,14 +300,12 @@ class Analysis:
             for start_node in start_nodes:
                 for end_node in end_nodes:
 
-                    paths = [
-                        list(x)
-                        for x in nx.all_shortest_paths(joined_graph, source=start_node, target=end_node)
-                    ]
-                    
                     # We need only those waves, when the last station is not the end station (a. k. a. unfinished wave)
                     if int(end_node[0]) != end_station:
-                        unfinished_waves += len(paths)
+                        unfinished_waves += sum(
+                            1
+                            for _ in nx.all_shortest_paths(joined_graph, source=start_node, target=end_node)
+                        )
 
         return unfinished_waves
 
@@ -293,8 +337,11 @@ class Analysis:
                         continue
             return edges
 
+        # The components do not depend on the section, so they are computed only once
+        components = FloodWaveHandler.get_weakly_connected_components(graph=joined_graph)
         for section in river_sections:
             flood_map_edges.extend(self.connected_components_iter(joined_graph=joined_graph, start_station=section[0],
-                                                                  end_station=section[1], func=func))
+                                                                  end_station=section[1], func=func,
+                                                                  components=components))
         flood_map.add_weighted_edges_from(ebunch_to_add=flood_map_edges)
         return flood_map
@@ -2,6 +2,7 @@ import itertools
 import os
 from typing import Union
 
+from joblib import Parallel, delayed, effective_n_jobs
 import numpy as np
 import pandas as pd
 
@@ -27,7 +28,8 @@ class FloodWaveDetector:
                  centered_window_radius: int = 2,
                  gauges: Union[list, None] = None,
                  start_date: str = None,
-                 end_date: str = None) -> None:
+                 end_date: str = None,
+                 n_jobs: int = 1) -> None:
         """
         Constructor for FloodWaveDetector class
 
@@ -43,6 +45,8 @@ class FloodWaveDetector:
         :param Union[list, None] gauges: The gauges used for the analysis.
         :param str start_date: The date to start the flood wave search from.
         :param str start_date: The date to finish the flood wave search at.
+        :param int n_jobs: The number of parallel workers used for finding the edges (1 means no parallelism,
+                           -1 means all CPUs).
         """
         
         self.data = FloodWaveData()
@@ -63,6 +67,7 @@ class FloodWaveDetector:
             self.end_date = end_date
         else:
             self.end_date = '2020-12-31'
+        self.n_jobs = n_jobs
 
     @measure_time
     def run(self) -> None:
@@ -121,24 +126,76 @@ class FloodWaveDetector:
         The end result is saved to 'PROJECT_PATH/generated/find_edges' folder.
         """
 
-        vertex_pairs = {}
         does_big_json_exist = os.path.exists(os.path.join(PROJECT_PATH, self.folder_name, 'find_edges',
                                              'vertex_pairs.json'))
 
-        for current_gauge, next_gauge in itertools.zip_longest(self.gauges[:-1], self.gauges[1:]):
-            does_actual_json_exist = os.path.exists(os.path.join(PROJECT_PATH, self.folder_name, 'find_edges',
-                                                    f'{current_gauge}_{next_gauge}.json'))
+        gauge_pairs = [
+            (current_gauge, next_gauge)
+            for current_gauge, next_gauge in itertools.zip_longest(self.gauges[:-1], self.gauges[1:])
+            if not (does_big_json_exist and os.path.exists(os.path.join(PROJECT_PATH, self.folder_name, 'find_edges',
+                                                                        f'{current_gauge}_{next_gauge}.json')))
+        ]
+        if not gauge_pairs:
+            return
+
+        # The gauge pairs are independent, each worker processes a chunk of them sequentially
+        n_chunks = min(effective_n_jobs(self.n_jobs), len(gauge_pairs))
+        chunks = np.array_split(np.arange(len(gauge_pairs)), n_chunks)
+        chunk_pairs = [
+            [gauge_pairs[idx] for idx in chunk]
+            for chunk in chunks
+        ]
+        # Each worker only receives the spans of its own gauges
+        results = Parallel(n_jobs=n_chunks)(
+            delayed(FloodWaveDetector.find_edges_for_gauge_pairs)(
+                gauge_pairs=pairs,
+                backward_dict={current_gauge: self.backward_dict[current_gauge] for current_gauge, _ in pairs},
+                forward_dict={current_gauge: self.forward_dict[current_gauge] for current_gauge, _ in pairs},
+                folder_name=self.folder_name
+            )
+            for pairs in chunk_pairs
+        )
+
+        # Store results for the all-in-one dict
+        vertex_pairs = {}
+        for result in results:
+            vertex_pairs.update(result)
+
+        # Save to file
+        if not vertex_pairs == {}:
+            JsonHelper.write(
+                filepath=os.path.join(PROJECT_PATH, self.folder_name, 'find_edges', 'vertex_pairs.json'),
+                obj=vertex_pairs
+            )
+
+    @staticmethod
+    def find_edges_for_gauge_pairs(
+            gauge_pairs: list,
+            backward_dict: dict,
+            forward_dict: dict,
+            folder_name: str
+    ) -> dict:
+        """
+        Creates the wave-pairs for the given (current gauge, next gauge) pairs and saves them out separately.
 
-            if does_actual_json_exist and does_big_json_exist:
-                continue
+        :param list gauge_pairs: List of (current gauge, next gauge) tuples to process
+        :param dict backward_dict: The dictionary containing the number of days allowed before a node for
+                                   continuation, for each gauge. This parameter is also called as alpha.
+        :param dict forward_dict: The dictionary containing the number of days allowed after a node for continuation,
+                                  for each gauge. This parameter is also called as beta.
+        :param str folder_name: Name of the folder to use for file handling.
+        :return dict: The wave-pairs of each processed gauge pair keyed by '{current_gauge}_{next_gauge}'
+        """
 
+        vertex_pairs = {}
+        for current_gauge, next_gauge in gauge_pairs:
             # Read the data from the actual gauge.
             current_gauge_candidate_vertices = FloodWaveHandler.read_vertex_file(gauge=current_gauge,
-                                                                                 folder_name=self.folder_name)
+                                                                                 folder_name=folder_name)
 
             # Read the data from the next gauge.
             next_gauge_candidate_vertices = FloodWaveHandler.read_vertex_file(gauge=next_gauge,
-                                                                              folder_name=self.folder_name)
+                                                                              folder_name=folder_name)
 
             # Create actual_next_pair
             gauge_pair = dict()
@@ -146,9 +203,9 @@ class FloodWaveDetector:
                 # Find next dates for the following gauge
                 next_gauge_dates = FloodWaveHandler.find_dates_for_next_gauge(
                     actual_date=actual_date,
-                    backward=self.backward_dict[current_gauge],
+                    backward=backward_dict[current_gauge],
                     next_gauge_candidate_vertices=next_gauge_candidate_vertices,
-                    forward=self.forward_dict[current_gauge]
+                    forward=forward_dict[current_gauge]
                 )
 
                 # Convert datetime to string
@@ -160,20 +217,13 @@ class FloodWaveDetector:
 
             # Save to file
             JsonHelper.write(
-                filepath=os.path.join(PROJECT_PATH, self.folder_name,
+                filepath=os.path.join(PROJECT_PATH, folder_name,
                                       'find_edges', f'{current_gauge}_{next_gauge}.json'),
                 obj=gauge_pair
             )
 
-            # Store result for the all-in-one dict
             vertex_pairs[f'{current_gauge}_{next_gauge}'] = gauge_pair
-
-        # Save to file
-        if not vertex_pairs == {}:
-            JsonHelper.write(
-                filepath=os.path.join(PROJECT_PATH, self.folder_name, 'find_edges', 'vertex_pairs.json'),
-                obj=vertex_pairs
-            )
+        return vertex_pairs
 
     @measure_time
     def mkdirs(self) -> None:
@@ -202,19 +252,16 @@ class FloodWaveDetector:
         """
             
         result = np.empty(gauge_ts.shape[0], dtype=GaugeData)
-        cond = np.r_[np.array([True] * gauge_ts.shape[0])]
+        cond = np.ones(gauge_ts.shape[0], dtype=bool)
 
         for shift in range(1, (self.centered_window_radius + 1)):
-            left_cond = np.r_[np.array([False] * shift), gauge_ts[shift:] > gauge_ts[:-shift]]
-            right_cond = np.r_[gauge_ts[:-shift] >= gauge_ts[shift:], np.array([False] * shift)]
-            cond = left_cond & right_cond & cond   
-            
-        peaks = list(np.where(cond)[0])
-        
-        for idx, value in enumerate(gauge_ts):
-            result[idx] = GaugeData(value=value)
-        for k in peaks:
-            result[k].is_peak = True
+            cond[:shift] = False
+            cond[-shift:] = False
+            cond[shift:] &= gauge_ts[shift:] > gauge_ts[:-shift]
+            cond[:-shift] &= gauge_ts[:-shift] >= gauge_ts[shift:]
+
+        for idx, (value, is_peak) in enumerate(zip(gauge_ts, cond.tolist())):
+            result[idx] = GaugeData(value=value, is_peak=is_peak)
         return result
 
     @staticmethod
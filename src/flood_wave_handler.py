@@ -1,14 +1,62 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+import itertools
 import os
 
 import networkx as nx
 import numpy as np
 import pandas as pd
+from scipy.sparse.csgraph import connected_components
 
 from src import PROJECT_PATH
 from src.json_helper import JsonHelper
 
 
+@lru_cache(maxsize=4096)
+def _read_wave_graph_file(filepath: str, mtime: float) -> nx.DiGraph:
+    """
+    Reads a saved wave graph. The result is cached, the modification time is part of the key
+    so that regenerated files are read again. The cache is bounded, so the least recently used graphs
+    (including the outdated versions of regenerated files) are dropped.
+
+    :param str filepath: The path of the saved wave graph
+    :param float mtime: The modification time of the file
+    :return nx.DiGraph: The wave graph
+    """
+    data = JsonHelper.read(filepath=filepath, log=False)
+    return nx.readwrite.json_graph.node_link_graph(data)
+
+
+@lru_cache(maxsize=256)
+def _list_wave_files(dirpath: str, mtime: float) -> tuple:
+    """
+    Lists the saved wave graph files of a directory ordered by their starting date. The result is cached,
+    the modification time of the directory is part of the key so that added or removed files are noticed.
+    The cache is bounded, so outdated listings are dropped eventually.
+
+    :param str dirpath: The path of the directory of a gauge pair
+    :param float mtime: The modification time of the directory
+    :return tuple: The tuple of the ordered filenames and the np.ndarray of their dates
+    """
+    filenames = next(os.walk(dirpath), (None, None, []))[2]
+    dates = FloodWaveHandler.get_wave_file_dates(filenames=filenames)
+    order = np.argsort(dates, kind='stable')
+    return tuple(filenames[idx] for idx in order), dates[order]
+
+
+@lru_cache(maxsize=4)
+def _read_vertex_pairs(filepath: str, mtime: float) -> dict:
+    """
+    Reads the all-in-one vertex pairs file. The result is cached, the modification time is part of the key
+    so that a regenerated file is read again.
+
+    :param str filepath: The path of the vertex pairs file
+    :param float mtime: The modification time of the file
+    :return dict: The contents of the file
+    """
+    return JsonHelper.read(filepath=filepath, log=False)
+
+
 class FloodWaveHandler:
     """This is a helper class for FloodWaveDetector.
 
@@ -23,14 +71,26 @@ class FloodWaveHandler:
 
         :param str gauge: the ID of the desired station
         :param str folder_name: Name of the folder to use for file handling.
-        :return pd.DataFrame: A Dataframe with the peak value and date
+        :return pd.DataFrame: A Dataframe with the peak value and date, sorted by date
         """
         gauge_with_index = JsonHelper.read(os.path.join(PROJECT_PATH, folder_name,
                                                         'find_vertices', f'{gauge}.json'))
         gauge_peaks = pd.DataFrame(data=gauge_with_index,
                                    columns=['Date', 'Max value'])
         gauge_peaks['Date'] = pd.to_datetime(gauge_peaks['Date'])
-        return gauge_peaks
+        return gauge_peaks.sort_values(by='Date', ignore_index=True)
+
+    @staticmethod
+    def read_vertex_pairs(folder_name: str) -> dict:
+        """
+        Reads the all-in-one vertex pairs file. It is cached, so repeated calls do not parse the file again.
+        The returned dictionary is shared, do not modify it.
+
+        :param str folder_name: Name of the folder to use for file handling.
+        :return dict: The wave-pairs of each gauge pair
+        """
+        filepath = os.path.join(PROJECT_PATH, folder_name, 'find_edges', 'vertex_pairs.json')
+        return _read_vertex_pairs(filepath=filepath, mtime=os.path.getmtime(filepath))
 
     @staticmethod
     def find_dates_for_next_gauge(
@@ -93,19 +153,26 @@ class FloodWaveHandler:
         :param str end: Final day of the interval.
         :return list filename_sort: List of filenames with waves in the given interval.
         """
-        start = datetime.strptime(start, '%Y-%m-%d')
-        end = datetime.strptime(end, '%Y-%m-%d')
+        dates = FloodWaveHandler.get_wave_file_dates(filenames=filenames)
+        in_interval = (dates >= np.datetime64(start, 'D')) & (dates <= np.datetime64(end, 'D'))
 
-        filename_sort = []
+        filename_sort = [
+            filename
+            for filename, keep in zip(filenames, in_interval)
+            if keep
+        ]
 
-        for filename in filenames:
-            date_str = filename.split(".json")[0]
-            date_dt = datetime.strptime(date_str, '%Y-%m-%d')
+        return filename_sort
 
-            if start <= date_dt <= end:
-                filename_sort.append(filename)
+    @staticmethod
+    def get_wave_file_dates(filenames: list) -> np.ndarray:
+        """
+        Converts the names of the saved wave graph files to the starting dates of the waves.
 
-        return filename_sort
+        :param list filenames: List of filenames named after the starting date of the wave
+        :return np.ndarray: The starting dates as a datetime64[D] array, in the order of the filenames
+        """
+        return np.array([filename.split(".json")[0] for filename in filenames], dtype='datetime64[D]')
 
     @staticmethod
     def filter_graph(
@@ -133,10 +200,7 @@ class FloodWaveHandler:
         :return nx.Graph: The filtered graph
         """
 
-        vertex_pairs = JsonHelper.read(
-            filepath=os.path.join(PROJECT_PATH, folder_name, 'find_edges', 'vertex_pairs.json'),
-            log=False
-        )
+        vertex_pairs = FloodWaveHandler.read_vertex_pairs(folder_name=folder_name)
 
         gauge_pairs = list(vertex_pairs.keys())
         up_limit = meta.loc[start_station].river_km
@@ -151,15 +215,12 @@ class FloodWaveHandler:
             if int(x.split('_')[0]) in start_gauges
         ]
 
-        joined_graph = nx.DiGraph()
-        for gauge_pair in selected_pairs:
-            joined_graph = FloodWaveHandler.compose_graph(
-                end_date=end_date,
-                gauge_pair=gauge_pair,
-                joined_graph=joined_graph,
-                start_date=start_date,
-                folder_name=folder_name
-            )
+        joined_graph = FloodWaveHandler.create_directed_graph(
+            start_date=start_date,
+            end_date=end_date,
+            gauge_pairs=selected_pairs,
+            folder_name=folder_name
+        )
 
         # second filter
         FloodWaveHandler.remove_nodes_with_improper_km_data(
@@ -277,23 +338,36 @@ class FloodWaveHandler:
         :return:
         """
 
-        connected_components = [
-            list(x)
-            for x in nx.connected_components(joined_graph)
-        ]
-
-        for sub_connected_component in connected_components:
-            res_start = [
-                int(node[0]) == start_station
-                for node in sub_connected_component
-            ]
-            res_end = [
-                int(node[0]) == end_station
+        for sub_connected_component in FloodWaveHandler.get_weakly_connected_components(graph=joined_graph):
+            component_gauges = {
+                int(node[0])
                 for node in sub_connected_component
-            ]
-            if (True not in res_start) or (True not in res_end):
+            }
+            if (start_station not in component_gauges) or (end_station not in component_gauges):
                 joined_graph.remove_nodes_from(sub_connected_component)
 
+    @staticmethod
+    def get_weakly_connected_components(graph: nx.Graph) -> list:
+        """
+        Returns the weakly connected components of a graph. The components are labelled by scipy on the sparse
+        adjacency matrix of the graph instead of a networkx traversal.
+
+        :param nx.Graph graph: The graph to split into components
+        :return list: List of the components, each of them is a list of nodes
+        """
+
+        nodes = list(graph.nodes)
+        if not nodes:
+            return []
+        # to_scipy_sparse_matrix is deprecated in networkx 2.7 and removed in 3.0, it is used because of the
+        # networkx==2.6.3 pin in requirements.txt (switch to to_scipy_sparse_array when the pin is raised)
+        adjacency = nx.to_scipy_sparse_matrix(graph, nodelist=nodes, weight=None, format='csr')
+        n_components, labels = connected_components(adjacency, directed=True, connection='weak')
+        components = [[] for _ in range(n_components)]
+        for node, label in zip(nodes, labels):
+            components[label].append(node)
+        return components
+
     @staticmethod
     def get_peak_list(peaks: pd.DataFrame) -> list:
         """
@@ -342,7 +416,7 @@ class FloodWaveHandler:
         """
         Find possible follow-up dates for the flood wave coming from the previous gauge
 
-        :param pd.DataFrame candidate_vertices: Dataframe to crop
+        :param pd.DataFrame candidate_vertices: Dataframe to crop, sorted by date (see read_vertex_file)
         :param datetime date: start date of the crop
         :param int forward_span: number of days we allow for continuing
         :param int backward_span: number of days we allow for delay
@@ -351,8 +425,13 @@ class FloodWaveHandler:
 
         max_date = date + timedelta(days=forward_span)
         min_date = date - timedelta(days=backward_span)
-        possible_dates = candidate_vertices[(candidate_vertices['Date'] >= min_date) &
-                                            (candidate_vertices['Date'] <= max_date)]
+        # The dates are sorted, so the interval can be sliced out instead of masking the whole column
+        dates = candidate_vertices['Date']
+        if dates.empty or dates.iloc[-1] < min_date or dates.iloc[0] > max_date:
+            return candidate_vertices.iloc[0:0]
+        lo = dates.searchsorted(min_date, side='left')
+        hi = dates.searchsorted(max_date, side='right')
+        possible_dates = candidate_vertices.iloc[lo:hi]
 
         return possible_dates
 
@@ -375,23 +454,75 @@ class FloodWaveHandler:
         :return nx.Graph: The graph that was made by combining individually saved ones.
         """
 
-        filenames = next(os.walk(os.path.join(PROJECT_PATH, folder_name, 'build_graph', f'{gauge_pair}')),
-                         (None, None, []))[2]
-        sorted_files = FloodWaveHandler.sort_wave(
-            filenames=filenames,
-            start=start_date,
-            end=end_date
-        )
-        for file in sorted_files:
-            data = JsonHelper.read(
-                filepath=os.path.join(PROJECT_PATH, folder_name, 'build_graph',
-                                      f'{gauge_pair}', f'{file}'),
-                log=False
-            )
-            h = nx.readwrite.json_graph.node_link_graph(data)
-            joined_graph = nx.compose(joined_graph, h)
+        joined_graph = joined_graph.copy()
+        for h in FloodWaveHandler._read_wave_graphs(
+                gauge_pair=gauge_pair,
+                start_date=start_date,
+                end_date=end_date,
+                folder_name=folder_name
+        ):
+            joined_graph.update(h)
         return joined_graph
 
+    @staticmethod
+    def _read_wave_graphs(
+            gauge_pair: str,
+            start_date: str,
+            end_date: str,
+            folder_name: str
+    ) -> list:
+        """
+        Reads the individually saved wave graphs of a gauge pair starting in the given time interval
+
+        :param str gauge_pair: This gauge pair indicates the starting node of the graphs
+        :param str start_date: The first possible starting date for the graphs to be read
+        :param str end_date: The last possible starting date for the graphs to be read
+        :param str folder_name: Name of the folder to use for file handling.
+        :return list: The list of the cached wave graphs. They are shared, so only create_directed_graph and
+                      compose_graph use them, copying their contents into a new graph.
+        """
+
+        dirpath = os.path.join(PROJECT_PATH, folder_name, 'build_graph', f'{gauge_pair}')
+        if not os.path.isdir(dirpath):
+            return []
+        filenames, dates = _list_wave_files(dirpath=dirpath, mtime=os.path.getmtime(dirpath))
+
+        # The listing is ordered by date, so the interval is found by two binary searches
+        start = np.datetime64(start_date, 'D')
+        end = np.datetime64(end_date, 'D')
+        if not dates.size or dates[-1] < start or dates[0] > end:
+            return []
+        lo = np.searchsorted(dates, start, side='left')
+        hi = np.searchsorted(dates, end, side='right')
+        sorted_files = filenames[lo:hi]
+        return [
+            FloodWaveHandler._read_wave_graph(
+                gauge_pair=gauge_pair,
+                filename=file,
+                folder_name=folder_name
+            )
+            for file in sorted_files
+        ]
+
+    @staticmethod
+    def _read_wave_graph(
+            gauge_pair: str,
+            filename: str,
+            folder_name: str
+    ) -> nx.DiGraph:
+        """
+        Reads an individually saved wave graph. Graphs are cached, so overlapping time intervals
+        do not read and parse the same files again. The returned graph is shared, see _read_wave_graphs.
+
+        :param str gauge_pair: The gauge pair indicating the starting node of the graph
+        :param str filename: The name of the saved graph file
+        :param str folder_name: Name of the folder to use for file handling.
+        :return nx.DiGraph: The saved wave graph
+        """
+
+        filepath = os.path.join(PROJECT_PATH, folder_name, 'build_graph', f'{gauge_pair}', f'{filename}')
+        return _read_wave_graph_file(filepath=filepath, mtime=os.path.getmtime(filepath))
+
     @staticmethod
     def create_positions(
                      joined_graph: nx.DiGraph,
@@ -408,10 +539,14 @@ class FloodWaveHandler:
         """
 
         positions = dict()
+        y_coords = {
+            gauge: len(gauges) - row
+            for row, gauge in enumerate(gauges)
+        }
 
         for node in joined_graph.nodes():
             x_coord = (datetime.strptime(node[1], '%Y-%m-%d') - start).days - 1
-            y_coord = len(gauges) - gauges.index(int(node[0]))
+            y_coord = y_coords[int(node[0])]
             positions[node] = (x_coord, y_coord)
         return positions
 
@@ -432,13 +567,16 @@ class FloodWaveHandler:
         :return nx.DiGraph: The composed directed graph
         """
 
-        joined_graph = nx.DiGraph()
-        for gauge_pair in gauge_pairs:
-            joined_graph = FloodWaveHandler.compose_graph(
-                end_date=end_date,
+        wave_graphs = itertools.chain.from_iterable(
+            FloodWaveHandler._read_wave_graphs(
                 gauge_pair=gauge_pair,
-                joined_graph=joined_graph,
                 start_date=start_date,
+                end_date=end_date,
                 folder_name=folder_name
             )
+            for gauge_pair in gauge_pairs
+        )
+        joined_graph = nx.DiGraph()
+        for h in wave_graphs:
+            joined_graph.update(h)
         return joined_graph
@@ -17,7 +17,7 @@ class GraphBuilder:
     """
     def __init__(self) -> None:
         self.vertex_pairs = {}
-        self.gauge_pairs = []
+        self.gauge_pairs = ()
         self.tree_g = nx.DiGraph()
         self.path = {}
         self.all_paths = {}
@@ -39,7 +39,7 @@ class GraphBuilder:
                 filepath=os.path.join(PROJECT_PATH, folder_name, 'find_edges', 'vertex_pairs.json'), log=False
             )
 
-        self.gauge_pairs = list(self.vertex_pairs.keys())
+        self.gauge_pairs = tuple(self.vertex_pairs.keys())
 
         for gauge_pair in self.gauge_pairs:
 
@@ -115,14 +115,13 @@ class GraphBuilder:
         """
 
         # other variables
-        max_index_value = len(self.vertex_pairs.keys()) - 1
+        max_index_value = len(self.gauge_pairs) - 1
         next_gauge_pair = self.gauge_pairs[next_idx]
-        current_gauge = next_gauge_pair.split('_')[0]
-        next_gauge = next_gauge_pair.split('_')[1]
+        current_gauge, next_gauge = next_gauge_pair.split('_')
         next_gauge_pair_dates = self.vertex_pairs[next_gauge_pair]
 
         # See if we continue the wave
-        can_path_be_continued = next_gauge_date in next_gauge_pair_dates.keys()
+        can_path_be_continued = next_gauge_date in next_gauge_pair_dates
 
         if can_path_be_continued and next_idx < max_index_value:
 
@@ -182,8 +181,7 @@ class GraphBuilder:
 
         self.reset_path()
 
-        actual_gauge = gauge_pair.split('_')[0]
-        next_gauge = gauge_pair.split('_')[1]
+        actual_gauge, next_gauge = gauge_pair.split('_')
 
         self.tree_g.add_edge(
             u_of_edge=(actual_gauge, actual_date),
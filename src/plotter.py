@@ -66,10 +66,9 @@ class Plotter:
             Plotter.save_plot_graph(directed_graph, folder_name=folder_name)
 
         start = datetime.strptime(start_date, '%Y-%m-%d')
-        min_date = min([node[1] for node in directed_graph.nodes()])
-        min_date = datetime.strptime(min_date, '%Y-%m-%d')
-        max_date = max([node[1] for node in directed_graph.nodes()])
-        max_date = datetime.strptime(max_date, '%Y-%m-%d')
+        node_dates = [node[1] for node in directed_graph.nodes()]
+        min_date = datetime.strptime(min(node_dates), '%Y-%m-%d')
+        max_date = datetime.strptime(max(node_dates), '%Y-%m-%d')
 
         positions = FloodWaveHandler.create_positions(joined_graph=directed_graph, start=start,
                                                       gauges=self.gauges)       
@@ -150,8 +149,9 @@ class Plotter:
         :return:
         """
 
-        min_x = min([n[0] for n in positions.values()])
-        max_x = max([n[0] for n in positions.values()])
+        x_coords = [n[0] for n in positions.values()]
+        min_x = min(x_coords)
+        max_x = max(x_coords)
         rng = max_x - min_x
         x_labels = pd.date_range(start,
                                  start + timedelta(days=rng),
@@ -271,7 +271,7 @@ class Plotter:
         gauge_data = self.data.dataloader.get_daily_time_series(reg_number_list=self.gauges).loc[min_date:max_date]
         nan_graph = nx.DiGraph()
         for gauge in gauge_data.columns:
-            nan_dates = gauge_data[str(gauge)].index[gauge_data[str(gauge)].apply(np.isnan)].strftime("%Y-%m-%d")
+            nan_dates = gauge_data[str(gauge)].index[gauge_data[str(gauge)].isna().to_numpy()].strftime("%Y-%m-%d")
 
             for date in nan_dates:
                 nan_graph.add_node(node_for_adding=(gauge, date))